@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import logging
+import orjson
+import threading
+import time
 import uvicorn
 from typing import Optional
 from model import get_model
+from batcher import GenerationBatcher
+from cache import SemanticCache
 from prompts import PromptTemplates
 from config import Config
 
@@ -20,21 +32,59 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AI Writer API",
     description="Generate high-quality content with AI-powered writing tools",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"] if Config.CORS_ORIGINS == "*" else Config.CORS_ORIGINS.split(","),
+    allow_origins=Config.CORS_LIST,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache"],
 )
 
+# Static response bodies, encoded once at import
+_HOME_BODY = orjson.dumps({
+    "message": "AI Writer API is running",
+    "version": "1.0.0",
+    "status": "online",
+    "docs": "/docs",
+    "endpoints": {
+        "generate": "/api/generate [POST]",
+        "generate_stream": "/api/generate/stream [POST]",
+        "health": "/api/health [GET]",
+        "model_info": "/api/model-info [GET]",
+        "create_template": "/api/create-template [POST]"
+    }
+})
+_NOT_FOUND_BODY = orjson.dumps({
+    "success": False,
+    "error": "Route not found",
+    "message": "The requested endpoint does not exist"
+})
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "success": False,
+    "error": "Internal server error",
+    "message": "Something went wrong on the server"
+})
+
 # Global model instance
 model = None
 
+# Request batcher (created on startup when Config.BATCH_ENABLED)
+batcher = None
+
+# Semantic cache instance (created on startup when Config.CACHE_ENABLED)
+semantic_cache = None
+
+# Exact-match response cache: sha256 key -> cleaned content (LRU order)
+_RESPONSE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+# In-flight generations per cache key, so identical requests wait instead of recomputing
+_RESPONSE_CACHE_LOCKS: dict = {}
+
 
 # Pydantic Models (Request/Response schemas)
 class GenerateRequest(BaseModel):
@@ -74,15 +124,163 @@ class HealthResponse(BaseModel):
     model_name: Optional[str]
 
 
+# Response cache helpers
+def _response_cache_key(request: GenerateRequest) -> str:
+    """Build the exact-match cache key from the deterministic request fields"""
+    raw = f"{request.type}|{request.max_length}|{request.temperature}|{request.input}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _is_cacheable(request: GenerateRequest, cache_opt_in: Optional[str]) -> bool:
+    """Cache near-deterministic generations, or any generation the client opted in for"""
+    if cache_opt_in is not None and cache_opt_in.lower() in ("1", "true", "yes"):
+        return True
+    return request.temperature is not None and request.temperature <= Config.RESPONSE_CACHE_MAX_TEMPERATURE
+
+
+def _cache_get(key: str) -> Optional[str]:
+    content = _RESPONSE_CACHE.get(key)
+    if content is not None:
+        _RESPONSE_CACHE.move_to_end(key)
+    return content
+
+
+def _cache_put(key: str, content: str):
+    _RESPONSE_CACHE[key] = content
+    _RESPONSE_CACHE.move_to_end(key)
+    while len(_RESPONSE_CACHE) > Config.RESPONSE_CACHE_MAX_ENTRIES:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+async def _run_in_executor(func, *args, **kwargs):
+    """Run a blocking call on the inference thread pool so the event loop stays responsive"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.executor, functools.partial(func, *args, **kwargs))
+
+
+async def _generate_cleaned(request: GenerateRequest) -> str:
+    """Run prompt building, model generation and output cleaning for a request"""
+    # Generate prompt
+    prompt = PromptTemplates.get_prompt(request.type, request.input)
+    logger.info(f"   Prompt created (length: {len(prompt)})")
+    
+    # Generate content
+    if batcher is not None:
+        generated_text = await batcher.submit(
+            prompt,
+            max_length=request.max_length,
+            temperature=request.temperature,
+            top_p=Config.TOP_P
+        )
+    else:
+        generated_text = await _run_in_executor(
+            model.generate_text,
+            prompt=prompt,
+            max_length=request.max_length,
+            temperature=request.temperature,
+            top_p=Config.TOP_P,
+            content_type=request.type
+        )
+    
+    # Clean output
+    return PromptTemplates.clean_output(generated_text, request.type)
+
+
+async def _semantic_get_or_generate(request: GenerateRequest):
+    """
+    Serve near-duplicate inputs from the semantic cache, generating on a miss
+    
+    Returns:
+        tuple: (content, cache_hit)
+    """
+    if semantic_cache is None:
+        return await _generate_cleaned(request), False
+    
+    # Redis calls block, so they run off the event loop like the encoder
+    embedding = await _run_in_executor(semantic_cache.encode, request.input)
+    content = await _run_in_executor(semantic_cache.get, request.type, request.max_length, embedding)
+    if content is not None:
+        return content, True
+    
+    content = await _generate_cleaned(request)
+    await _run_in_executor(semantic_cache.put, request.type, request.max_length, embedding, content)
+    return content, False
+
+
+async def _get_or_generate(key: str, request: GenerateRequest):
+    """
+    Return cached content for key, generating and storing it on a miss
+    
+    Returns:
+        tuple: (content, cache_hit)
+    """
+    content = _cache_get(key)
+    if content is not None:
+        return content, True
+    
+    lock = _RESPONSE_CACHE_LOCKS.get(key)
+    if lock is None:
+        lock = _RESPONSE_CACHE_LOCKS[key] = asyncio.Lock()
+    
+    async with lock:
+        # Another request may have filled the entry while we waited
+        content = _cache_get(key)
+        if content is not None:
+            return content, True
+        try:
+            content, cache_hit = await _semantic_get_or_generate(request)
+            _cache_put(key, content)
+        finally:
+            _RESPONSE_CACHE_LOCKS.pop(key, None)
+    
+    return content, cache_hit
+
+
+async def _warmup_model():
+    """
+    Run throwaway generations so the first real request does not pay
+    one-time costs (torch.compile graph capture, lazy kernel loading)
+    
+    The full-length pass only pays off when there are compiled graphs or
+    CUDA kernels to capture; on plain CPU it would just add hundreds of
+    sampled tokens to every (reload) startup.
+    """
+    lengths = [50]
+    if Config.TORCH_COMPILE or model.device.type == "cuda":
+        lengths.append(Config.MAX_LENGTH)
+    
+    for max_length in lengths:
+        start = time.perf_counter()
+        try:
+            await _run_in_executor(
+                model.generate_text,
+                prompt="Warmup.",
+                max_length=max_length,
+                temperature=0.7,
+                top_p=Config.TOP_P
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Warmup failed: {e}")
+            return
+        logger.info(f"Warmup (max_length={max_length}) took {time.perf_counter() - start:.2f}s")
+
+
 # Startup event - Load model
 @app.on_event("startup")
 async def startup_event():
     """Load model on startup"""
-    global model
+    global model, batcher, semantic_cache
+    app.state.executor = ThreadPoolExecutor(
+        max_workers=Config.MAX_INFERENCE_WORKERS,
+        thread_name_prefix="inference"
+    )
     try:
         logger.info("=" * 60)
         logger.info("🚀 FastAPI Server Starting...")
         logger.info("=" * 60)
+        is_valid, message = Config.validate_config()
+        if not is_valid:
+            raise ValueError(f"Invalid configuration:\n{message}")
         logger.info("Loading AI model...")
         model = get_model(Config.MODEL_NAME)
         logger.info("=" * 60)
@@ -90,35 +288,65 @@ async def startup_event():
         logger.info("=" * 60)
     except Exception as e:
         logger.error(f"❌ Failed to load model: {e}")
+    
+    if Config.WARMUP:
+        PromptTemplates.warmup()
+        if model is not None:
+            await _warmup_model()
+    
+    if Config.BATCH_ENABLED and model is not None:
+        batcher = GenerationBatcher(
+            model,
+            max_batch_size=Config.BATCH_MAX_SIZE,
+            max_wait_ms=Config.BATCH_WAIT_MS,
+            executor=app.state.executor
+        )
+        batcher.start()
+    
+    if Config.CACHE_ENABLED:
+        try:
+            semantic_cache = SemanticCache(
+                redis_url=Config.REDIS_URL,
+                encoder_name=Config.SEMANTIC_CACHE_MODEL,
+                threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+                ttl=Config.CACHE_TTL,
+                index_name=Config.SEMANTIC_CACHE_INDEX,
+                socket_timeout=Config.REDIS_SOCKET_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Semantic cache disabled: {e}")
+
+
+# Shutdown event - Stop background workers
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the request batcher and the inference thread pool"""
+    global batcher
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    app.state.executor.shutdown(wait=True)
 
 
 # Routes
 @app.get("/")
 async def home():
     """Home route"""
-    return {
-        "message": "AI Writer API is running",
-        "version": "1.0.0",
-        "status": "online",
-        "docs": "/docs",
-        "endpoints": {
-            "generate": "/api/generate [POST]",
-            "health": "/api/health [GET]",
-            "model_info": "/api/model-info [GET]",
-            "create_template": "/api/create-template [POST]"
-        }
-    }
+    return Response(content=_HOME_BODY, media_type="application/json")
 
 
-@app.get("/api/health", response_model=HealthResponse)
+# Responses below are built server-side from trusted values, so they are
+# returned via model_construct and documented with `responses=` instead of
+# `response_model=`, which would re-validate every field on each request.
+@app.get("/api/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "ok",
-        "message": "Server is running",
-        "model_loaded": model is not None,
-        "model_name": Config.MODEL_NAME if model else None
-    }
+    return HealthResponse.model_construct(
+        status="ok",
+        message="Server is running",
+        model_loaded=model is not None,
+        model_name=Config.MODEL_NAME if model else None
+    )
 
 
 @app.get("/api/model-info")
@@ -141,15 +369,24 @@ async def model_info():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/generate", response_model=GenerateResponse)
-async def generate_content(request: GenerateRequest):
+@app.post("/api/generate", responses={200: {"model": GenerateResponse}})
+async def generate_content(
+    request: GenerateRequest,
+    response: Response,
+    x_cache_opt_in: Optional[str] = Header(default=None)
+):
     """
     Generate AI content
     
     - **input**: Text input for content generation
     - **type**: Type of content (blog, email, copy, seo, video, summarize)
-    - **max_length**: Maximum length of generated content (50-2000)
+    - **max_length**: Maximum length in tokens, prompt included (50-2000); generation
+      stops after `max_length - prompt tokens` new tokens, and always produces at least one
     - **temperature**: Creativity level (0.1-1.0)
+    
+    Identical requests with a low temperature (or an `X-Cache-Opt-In: true` header)
+    are served from an in-memory cache, and near-duplicate ones from the semantic
+    cache when it is enabled; the `X-Cache` response header reports HIT or MISS.
     """
     try:
         # Check if model is loaded
@@ -165,31 +402,27 @@ async def generate_content(request: GenerateRequest):
         logger.info(f"   Max length: {request.max_length}")
         logger.info(f"   Temperature: {request.temperature}")
         
-        # Generate prompt
-        prompt = PromptTemplates.get_prompt(request.type, request.input)
-        logger.info(f"   Prompt created (length: {len(prompt)})")
-        
-        # Generate content
-        generated_text = model.generate_text(
-            prompt=prompt,
-            max_length=request.max_length,
-            temperature=request.temperature,
-            top_p=Config.TOP_P
-        )
-        
-        # Clean output
-        cleaned_text = PromptTemplates.clean_output(generated_text, request.type)
+        if not _is_cacheable(request, x_cache_opt_in):
+            cleaned_text, cache_hit = await _generate_cleaned(request), False
+        elif Config.RESPONSE_CACHE_MAX_ENTRIES > 0:
+            cleaned_text, cache_hit = await _get_or_generate(_response_cache_key(request), request)
+        else:
+            cleaned_text, cache_hit = await _semantic_get_or_generate(request)
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
         
-        logger.info(f"✓ Content generated successfully!")
+        if cache_hit:
+            logger.info(f"✓ Content served from cache")
+        else:
+            logger.info(f"✓ Content generated successfully!")
         logger.info(f"   Output length: {len(cleaned_text)} characters")
         
-        return {
-            "success": True,
-            "content": cleaned_text,
-            "type": request.type,
-            "input_length": len(request.input),
-            "output_length": len(cleaned_text)
-        }
+        return GenerateResponse.model_construct(
+            success=True,
+            content=cleaned_text,
+            type=request.type,
+            input_length=len(request.input),
+            output_length=len(cleaned_text)
+        )
         
     except HTTPException:
         raise
@@ -198,6 +431,54 @@ async def generate_content(request: GenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/generate/stream")
+async def generate_content_stream(request: GenerateRequest):
+    """
+    Stream AI content as server-sent events
+    
+    Takes the same fields as /api/generate. Each event carries the next
+    chunk of text as `data: {"chunk": "..."}`; the stream ends with an
+    `event: done` (or `event: error`) message. Streamed output is not
+    cleaned or cached. Streams share the inference thread pool with
+    /api/generate, and decoding stops when the client disconnects.
+    """
+    if model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model not loaded. Please wait and try again."
+        )
+    
+    logger.info(f"📡 Streaming {request.type} content...")
+    prompt = PromptTemplates.get_prompt(request.type, request.input)
+    stop_event = threading.Event()
+    
+    # Generation runs on the bounded inference pool like /api/generate
+    chunks = model.generate_text_stream(
+        prompt=prompt,
+        max_length=request.max_length,
+        temperature=request.temperature,
+        top_p=Config.TOP_P,
+        content_type=request.type,
+        executor=app.state.executor,
+        stop_event=stop_event
+    )
+    
+    async def event_stream():
+        try:
+            # Each blocking next() runs in Starlette's threadpool, off the event loop
+            async for chunk in iterate_in_threadpool(chunks):
+                yield b"data: " + orjson.dumps({"chunk": chunk}) + b"\n\n"
+            yield b"event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"❌ Error streaming content: {e}")
+            yield b"event: error\ndata: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+        finally:
+            # A client disconnect cancels this generator; stop decoding as well
+            stop_event.set()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/api/create-template")
 async def create_template(request: TemplateRequest):
     """
@@ -228,28 +509,14 @@ async def create_template(request: TemplateRequest):
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
     """Handle 404 errors"""
-    return JSONResponse(
-        status_code=404,
-        content={
-            "success": False,
-            "error": "Route not found",
-            "message": "The requested endpoint does not exist"
-        }
-    )
+    return Response(content=_NOT_FOUND_BODY, status_code=404, media_type="application/json")
 
 
 @app.exception_handler(500)
 async def internal_error_handler(request: Request, exc: Exception):
     """Handle 500 errors"""
     logger.error(f"Internal server error: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={
-            "success": False,
-            "error": "Internal server error",
-            "message": "Something went wrong on the server"
-        }
-    )
+    return Response(content=_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
 
 
 # Run server
@@ -268,15 +535,20 @@ if __name__ == "__main__":
     print(f"   • GET  /api/health          - Health Check")
     print(f"   • GET  /api/model-info      - Model Information")
     print(f"   • POST /api/generate        - Generate Content")
+    print(f"   • POST /api/generate/stream - Stream Generated Content (SSE)")
     print(f"   • POST /api/create-template - Create Template")
     print(f"   • GET  /docs                - Interactive API Documentation")
     print("=" * 60)
     print("\n⏳ Server is starting... Please wait for model to load.\n")
     
+    # Prefer the Cython event loop and HTTP parser; uvloop is not available on Windows
     uvicorn.run(
         "app:app",
         host=Config.HOST,
         port=Config.PORT,
         reload=Config.DEBUG,
+        workers=Config.WORKERS,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
         log_level="info"
     )
\ No newline at end of file
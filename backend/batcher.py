@@ -0,0 +1,124 @@
+# batcher.py - Micro-batching of Concurrent Generation Requests
+
+import asyncio
+import functools
+import logging
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class GenerationBatcher:
+    """
+    Collects concurrent generation requests into batched model calls
+    
+    Requests are queued and drained every few milliseconds (or as soon as a
+    batch is full). Requests sharing the same sampling parameters run
+    together in one AIWriterModel.generate_batch call.
+    """
+    
+    def __init__(self, model, max_batch_size=8, max_wait_ms=15, executor=None):
+        """
+        Args:
+            model (AIWriterModel): Loaded model
+            max_batch_size (int): Maximum number of prompts per model call
+            max_wait_ms (int): How long to wait for more requests after the first one
+            executor (concurrent.futures.Executor): Where batched model calls run
+                (None uses the event loop's default executor)
+        """
+        self.model = model
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self._task = None
+    
+    def start(self):
+        """Start the background batching task on the running event loop"""
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Generation batcher started (max batch: {self.max_batch_size}, window: {self.max_wait * 1000:.0f}ms)")
+    
+    async def stop(self):
+        """Stop the background task and fail any requests still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self.queue is not None and not self.queue.empty():
+            _, _, _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Server is shutting down"))
+    
+    async def submit(self, prompt, max_length=500, temperature=0.7, top_p=0.9):
+        """
+        Queue a prompt and wait for its generated text
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum total length (prompt + output)
+            temperature (float): Creativity level
+            top_p (float): Nucleus sampling parameter
+        
+        Returns:
+            str: Generated text, without the prompt
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((prompt, max_length, (temperature, top_p), future))
+        return await future
+    
+    async def _collect(self):
+        """Wait for one request, then gather more until the window closes or the batch is full"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        """Background loop: collect a batch, run it, resolve the futures"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            
+            # generate() takes one set of sampling parameters per call
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[2], []).append(item)
+            
+            for (temperature, top_p), items in groups.items():
+                # Skip requests whose client already went away
+                items = [item for item in items if not item[3].done()]
+                if not items:
+                    continue
+                
+                try:
+                    results = await loop.run_in_executor(self.executor, functools.partial(
+                        self.model.generate_batch,
+                        [item[0] for item in items],
+                        [item[1] for item in items],
+                        temperature=temperature,
+                        top_p=top_p
+                    ))
+                except Exception as e:
+                    for item in items:
+                        if not item[3].done():
+                            item[3].set_exception(e)
+                    continue
+                
+                for item, text in zip(items, results):
+                    if not item[3].done():
+                        item[3].set_result(text)
@@ -0,0 +1,177 @@
+# cache.py - Semantic Response Cache
+
+import logging
+import re
+import uuid
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Characters that must be escaped inside a RediSearch TAG query
+_TAG_ESCAPE_RE = re.compile(r"([^\w])")
+
+
+class SemanticCache:
+    """
+    Semantic cache for generated content
+    
+    Stores (embedding, response) pairs in a Redis HNSW vector index and returns
+    the cached response when a new input is similar enough to a previous one,
+    so paraphrased prompts skip the model entirely.
+    
+    Requires the optional `redis` and `sentence-transformers` packages and a
+    Redis server with the RediSearch module (e.g. Redis Stack).
+    """
+    
+    def __init__(self, redis_url, encoder_name, threshold=0.92, ttl=3600, index_name="ai_writer_cache",
+                 socket_timeout=0.5):
+        """
+        Connect to Redis, load the sentence encoder and create the index if needed
+        
+        Args:
+            redis_url (str): Redis connection URL
+            encoder_name (str): Sentence-transformers model used for embeddings
+            threshold (float): Minimum cosine similarity for a cache hit
+            ttl (int): Time to live of cached entries in seconds
+            index_name (str): Name of the RediSearch index (also the key prefix)
+            socket_timeout (float): Seconds before a Redis call fails instead of blocking
+        """
+        import numpy as np
+        import redis
+        from sentence_transformers import SentenceTransformer
+        
+        self._np = np
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index_name = index_name
+        self.prefix = f"{index_name}:"
+        
+        logger.info(f"Loading semantic cache encoder: {encoder_name}...")
+        self.encoder = SentenceTransformer(encoder_name)
+        self.dim = self.encoder.get_sentence_embedding_dimension()
+        
+        self.client = redis.Redis.from_url(
+            redis_url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        self._ensure_index(redis)
+        logger.info(f"✓ Semantic cache ready (index: {index_name}, threshold: {threshold})")
+    
+    def _ensure_index(self, redis):
+        """Create the HNSW vector index unless it already exists"""
+        from redis.commands.search.field import NumericField, TagField, VectorField
+        try:
+            from redis.commands.search.index_definition import IndexDefinition, IndexType
+        except ImportError:  # redis-py < 6
+            from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+        
+        search = self.client.ft(self.index_name)
+        try:
+            search.info()
+        except redis.ResponseError:
+            pass
+        else:
+            # Indexes created before max_length was stored lack the field
+            try:
+                search.alter_schema_add([NumericField("max_length")])
+                logger.info(f"Added max_length to semantic cache index: {self.index_name}")
+            except redis.ResponseError:
+                pass  # Already present
+            return
+        
+        search.create_index(
+            [
+                TagField("type"),
+                NumericField("max_length"),
+                VectorField("embedding", "HNSW", {
+                    "TYPE": "FLOAT32",
+                    "DIM": self.dim,
+                    "DISTANCE_METRIC": "COSINE"
+                })
+            ],
+            definition=IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+        )
+        logger.info(f"Created semantic cache index: {self.index_name}")
+    
+    @staticmethod
+    def normalize(text):
+        """Lowercase and collapse whitespace before embedding"""
+        return " ".join(text.lower().split())
+    
+    def encode(self, text):
+        """
+        Embed text for cache lookup
+        
+        Args:
+            text (str): User input
+        
+        Returns:
+            numpy.ndarray: float32 embedding vector
+        """
+        embedding = self.encoder.encode(self.normalize(text), normalize_embeddings=True)
+        return self._np.asarray(embedding, dtype=self._np.float32)
+    
+    def get(self, content_type, max_length, embedding):
+        """
+        Find the nearest cached response with the same content type and max_length
+        
+        Args:
+            content_type (str): Type of content
+            max_length (int): Requested maximum length
+            embedding (numpy.ndarray): Embedding of the user input
+        
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        from redis.commands.search.query import Query
+        
+        tag = _TAG_ESCAPE_RE.sub(r"\\\1", content_type)
+        query = (
+            Query(f"(@type:{{{tag}}} @max_length:[{max_length} {max_length}])=>[KNN 1 @embedding $vec AS distance]")
+            .sort_by("distance")
+            .return_fields("response", "distance")
+            .dialect(2)
+        )
+        try:
+            result = self.client.ft(self.index_name).search(query, query_params={"vec": embedding.tobytes()})
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+        
+        if not result.docs:
+            return None
+        
+        doc = result.docs[0]
+        # COSINE distance is 1 - cosine similarity
+        similarity = 1.0 - float(doc.distance)
+        if similarity < self.threshold:
+            return None
+        
+        logger.info(f"Semantic cache hit (similarity: {similarity:.3f})")
+        response = doc.response
+        return response.decode("utf-8") if isinstance(response, bytes) else response
+    
+    def put(self, content_type, max_length, embedding, response):
+        """
+        Store a generated response
+        
+        Args:
+            content_type (str): Type of content
+            max_length (int): Maximum length the response was generated with
+            embedding (numpy.ndarray): Embedding of the user input
+            response (str): Cleaned generated content
+        """
+        key = f"{self.prefix}{content_type}:{uuid.uuid4().hex}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(key, mapping={
+                "type": content_type,
+                "max_length": max_length,
+                "response": response,
+                "embedding": embedding.tobytes()
+            })
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
@@ -1,6 +1,7 @@
 # config.py - Configuration Settings
 
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -16,6 +17,8 @@ class Config:
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
+    # Each worker process loads its own copy of the model; ignored when DEBUG reload is on
+    WORKERS = int(os.getenv('WORKERS', 1))
     
     # ==================== Model Configuration ====================
     # Available models (from lightweight to heavy):
@@ -53,14 +56,50 @@ class Config:
     RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'False').lower() == 'true'
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', 10))
     
+    # ==================== Batching Settings (Optional) ====================
+    # Group concurrent /api/generate requests into one batched model call
+    BATCH_ENABLED = os.getenv('BATCH_ENABLED', 'False').lower() == 'true'
+    BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 8))
+    BATCH_WAIT_MS = int(os.getenv('BATCH_WAIT_MS', 15))
+    
     # ==================== Cache Settings (Optional) ====================
     CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'False').lower() == 'true'
     CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # Time to live in seconds
+    # Semantic cache (enabled by CACHE_ENABLED, needs Redis Stack + sentence-transformers)
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    SEMANTIC_CACHE_MODEL = os.getenv('SEMANTIC_CACHE_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+    SEMANTIC_CACHE_INDEX = os.getenv('SEMANTIC_CACHE_INDEX', 'ai_writer_cache')
+    # Seconds before a Redis call is abandoned and treated as a cache miss
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+    
+    # Exact-match in-memory response cache (0 entries disables it)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    # Only near-deterministic generations are cached unless the client opts in
+    RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv('RESPONSE_CACHE_MAX_TEMPERATURE', 0.3))
     
     # ==================== Model Loading Settings ====================
     LOW_CPU_MEM_USAGE = os.getenv('LOW_CPU_MEM_USAGE', 'True').lower() == 'true'
     USE_GPU = os.getenv('USE_GPU', 'False').lower() == 'true'
     DEVICE = 0 if USE_GPU else -1  # 0 for GPU, -1 for CPU
+    # Weight dtype: auto (FP16 on GPU, BF16 on CPUs that support it, else FP32), float32, float16, bfloat16
+    TORCH_DTYPE = os.getenv('TORCH_DTYPE', 'auto')
+    # Compile the model forward with torch.compile (first requests pay the compile cost)
+    TORCH_COMPILE = os.getenv('TORCH_COMPILE', 'False').lower() == 'true'
+    # Weight quantization: none (default) or int8 (bitsandbytes on GPU, OpenVINO on CPU)
+    QUANTIZATION = os.getenv('QUANTIZATION', 'none').lower()
+    # Inference backend: pt (PyTorch), onnx (ONNX Runtime) or openvino
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pt').lower()
+    # Exported ONNX / OpenVINO models are cached here to skip the export on restart
+    EXPORT_CACHE_DIR = os.path.expanduser(os.getenv('EXPORT_CACHE_DIR', '~/.cache/ai_writer'))
+    
+    # Run warmup generations on startup so the first request is not slow
+    # (a full MAX_LENGTH pass is added only with TORCH_COMPILE or on GPU)
+    WARMUP = os.getenv('WARMUP', 'True').lower() == 'true'
+    
+    # ==================== Inference Workers ====================
+    # Threads running model inference off the event loop (2 on CPU, 1 per GPU)
+    MAX_INFERENCE_WORKERS = int(os.getenv('MAX_INFERENCE_WORKERS', 1 if USE_GPU else 2))
     
     @classmethod
     def get_config_dict(cls):
@@ -74,11 +113,16 @@ class Config:
             'server': {
                 'host': cls.HOST,
                 'port': cls.PORT,
-                'debug': cls.DEBUG
+                'debug': cls.DEBUG,
+                'workers': cls.WORKERS
             },
             'model': {
                 'name': cls.MODEL_NAME,
-                'device': 'GPU' if cls.USE_GPU else 'CPU'
+                'backend': cls.INFERENCE_BACKEND,
+                'device': 'GPU' if cls.USE_GPU else 'CPU',
+                'dtype': cls.TORCH_DTYPE,
+                'compile': cls.TORCH_COMPILE,
+                'quantization': cls.QUANTIZATION
             },
             'generation': {
                 'max_length': cls.MAX_LENGTH,
@@ -105,10 +149,15 @@ class Config:
         print(f"   • Host: {cls.HOST}")
         print(f"   • Port: {cls.PORT}")
         print(f"   • Debug: {cls.DEBUG}")
+        print(f"   • Workers: {cls.WORKERS}")
         print(f"\n🤖 Model:")
         print(f"   • Name: {cls.MODEL_NAME}")
+        print(f"   • Backend: {cls.INFERENCE_BACKEND}")
         print(f"   • Device: {'GPU' if cls.USE_GPU else 'CPU'}")
         print(f"   • Low CPU Memory: {cls.LOW_CPU_MEM_USAGE}")
+        print(f"   • Dtype: {cls.TORCH_DTYPE}")
+        print(f"   • torch.compile: {cls.TORCH_COMPILE}")
+        print(f"   • Quantization: {cls.QUANTIZATION}")
         print(f"\n📝 Generation:")
         print(f"   • Max Length: {cls.MAX_LENGTH}")
         print(f"   • Min Length: {cls.MIN_LENGTH}")
@@ -143,6 +192,18 @@ class Config:
         if not (0.0 <= cls.TOP_P <= 1.0):
             errors.append(f"Invalid TOP_P: {cls.TOP_P}. Must be between 0.0 and 1.0")
         
+        # Validate inference backend
+        if cls.INFERENCE_BACKEND not in ('pt', 'onnx', 'openvino'):
+            errors.append(f"Invalid INFERENCE_BACKEND: {cls.INFERENCE_BACKEND}. Must be pt, onnx or openvino")
+        
+        # Validate weight dtype and quantization
+        if cls.TORCH_DTYPE.lower() not in ('auto', 'float32', 'float16', 'bfloat16'):
+            errors.append(f"Invalid TORCH_DTYPE: {cls.TORCH_DTYPE}. Must be auto, float32, float16 or bfloat16")
+        if cls.QUANTIZATION not in ('none', 'int8'):
+            errors.append(f"Invalid QUANTIZATION: {cls.QUANTIZATION}. Must be none or int8")
+        elif cls.QUANTIZATION == 'int8' and cls.INFERENCE_BACKEND == 'onnx':
+            errors.append("QUANTIZATION=int8 is not supported with INFERENCE_BACKEND=onnx. Use pt or openvino")
+        
         # Validate lengths
         if cls.MIN_LENGTH > cls.MAX_LENGTH:
             errors.append(f"MIN_LENGTH ({cls.MIN_LENGTH}) cannot be greater than MAX_LENGTH ({cls.MAX_LENGTH})")
@@ -173,7 +234,42 @@ class TestingConfig(Config):
     MAX_LENGTH = 100
 
 
+# ==================== Precomputed Settings ====================
+def _freeze(value):
+    """Recursively wrap dicts in read-only mapping proxies"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+def _precompute(config_cls):
+    """
+    Attach values derived from the final class attributes
+    
+    - CORS_LIST: parsed CORS origins, ready for the CORS middleware
+    - SNAPSHOT: read-only copy of get_config_dict()
+    """
+    if config_cls.CORS_ORIGINS == "*":
+        config_cls.CORS_LIST = ("*",)
+    else:
+        config_cls.CORS_LIST = tuple(
+            origin.strip() for origin in config_cls.CORS_ORIGINS.split(",") if origin.strip()
+        )
+    config_cls.SNAPSHOT = _freeze(config_cls.get_config_dict())
+
+
+for _config_cls in (Config, DevelopmentConfig, ProductionConfig, TestingConfig):
+    _precompute(_config_cls)
+
+
 # Config selector based on environment
+_CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
+
+
 def get_config():
     """
     Get configuration based on environment
@@ -182,11 +278,4 @@ def get_config():
         Config: Configuration class
     """
     env = os.getenv('ENV', 'development').lower()
-    
-    configs = {
-        'development': DevelopmentConfig,
-        'production': ProductionConfig,
-        'testing': TestingConfig
-    }
-    
-    return configs.get(env, DevelopmentConfig)
\ No newline at end of file
+    return _CONFIGS.get(env, DevelopmentConfig)
\ No newline at end of file
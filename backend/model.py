@@ -1,13 +1,106 @@
 # model.py - AI Model Configuration and Loading
 
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-import torch
+# torch and transformers are imported lazily in AIWriterModel.__init__, so
+# importing this module (e.g. for config or CLI tooling) stays fast
+import copy
+import hashlib
 import logging
+import os
+import shutil
+import tempfile
+import threading
+from config import Config
+from prompts import PromptTemplates
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _cpu_supports_bf16(torch):
+    """Check whether this CPU has native BF16 kernels (AVX-512 class hardware)"""
+    try:
+        if "AVX512" not in torch.backends.cpu.get_cpu_capability():
+            return False
+        return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def _resolve_dtype(torch, use_gpu):
+    """
+    Pick the weight dtype for inference
+    
+    Half precision halves the weight bytes moved per decoded token:
+    FP16 on GPU, BF16 on CPUs with native support, FP32 otherwise.
+    """
+    name = Config.TORCH_DTYPE.lower()
+    if name != 'auto':
+        return getattr(torch, name)
+    if use_gpu:
+        return torch.float16
+    if _cpu_supports_bf16(torch):
+        return torch.bfloat16
+    return torch.float32
+
+
+def _export_dir(kind, model_name):
+    """
+    Get the cache directory of an exported model, always under Config.EXPORT_CACHE_DIR
+    
+    Hub names keep a readable path (e.g. onnx/facebook/opt-350m). Local
+    checkpoints (absolute or relative paths) use their directory name plus a
+    short hash of the absolute path, so os.path.join never resolves to the
+    checkpoint itself.
+    """
+    if os.path.isabs(model_name) or os.path.isdir(model_name):
+        path = os.path.abspath(model_name)
+        digest = hashlib.sha256(path.encode('utf-8')).hexdigest()[:12]
+        base = os.path.basename(path.rstrip('/\\')) or 'model'
+        name = f"{base}-{digest}"
+    else:
+        name = model_name.strip('/\\').replace(':', '')
+    return os.path.join(Config.EXPORT_CACHE_DIR, kind, name)
+
+
+# Fragments of the errors transformers raises when an attn_implementation
+# cannot be used (unsupported architecture, flash_attn missing, torch too old)
+_ATTENTION_ERROR_MARKERS = ('attn_implementation', 'flash', 'sdpa', 'scaled_dot_product_attention')
+
+
+def _is_attention_unsupported(error):
+    """Tell whether a from_pretrained error means the requested attention kernel is unavailable"""
+    message = str(error).lower()
+    return any(marker in message for marker in _ATTENTION_ERROR_MARKERS)
+
+
+def _stop_on_event(torch, stop_event):
+    """Build stopping criteria that end generation once stop_event is set"""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    
+    class _StopOnEvent(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), stop_event.is_set(), dtype=torch.bool, device=input_ids.device)
+    
+    return StoppingCriteriaList([_StopOnEvent()])
+
+
+def _stop_at_budgets(torch, prompt_length, budgets):
+    """Build stopping criteria that finish each batch row after its own new-token budget"""
+    from transformers import StoppingCriteria, StoppingCriteriaList
+    
+    class _StopAtBudgets(StoppingCriteria):
+        def __init__(self):
+            self.budgets = None
+        
+        def __call__(self, input_ids, scores, **kwargs):
+            if self.budgets is None:
+                self.budgets = torch.tensor(budgets, device=input_ids.device)
+            return (input_ids.shape[1] - prompt_length) >= self.budgets
+    
+    return StoppingCriteriaList([_StopAtBudgets()])
+
+
 class AIWriterModel:
     def __init__(self, model_name="gpt2"):
         """
@@ -25,6 +118,11 @@ class AIWriterModel:
         self.model_name = model_name
         
         try:
+            # Heavy imports happen here, on first model load
+            import torch
+            from transformers import AutoTokenizer
+            self._torch = torch
+            
             # Load tokenizer
             logger.info("Loading tokenizer...")
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
@@ -33,25 +131,31 @@ class AIWriterModel:
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
             
-            # Load model
-            logger.info("Loading model...")
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float32,
-                low_cpu_mem_usage=True
-            )
+            # Select device
+            use_gpu = Config.USE_GPU and self._torch.cuda.is_available()
+            if Config.USE_GPU and not use_gpu:
+                logger.warning("USE_GPU is set but CUDA is not available, falling back to CPU")
+            self.device = self._torch.device("cuda" if use_gpu else "cpu")
             
-            # Set model to evaluation mode
-            self.model.eval()
+            # Load model; self.backend is updated to the runtime actually used
+            self.backend = Config.INFERENCE_BACKEND
+            self.quantized = Config.QUANTIZATION == 'int8'
+            if self.backend == 'onnx':
+                if self.quantized:
+                    raise ValueError("QUANTIZATION=int8 is not supported with INFERENCE_BACKEND=onnx")
+                self.model = self._load_onnx_model(model_name, use_gpu)
+            elif self.backend == 'openvino':
+                self.model = self._load_openvino_model(model_name, load_in_8bit=self.quantized)
+            elif self.quantized:
+                self.model = self._load_int8_model(model_name, use_gpu)
+            else:
+                self.model = self._load_model(model_name, use_gpu)
             
-            # Create text generation pipeline
-            logger.info("Creating text generation pipeline...")
-            self.generator = pipeline(
-                'text-generation',
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=-1  # -1 for CPU, 0 for GPU
-            )
+            # Template prefix caches: content type -> (prefix, prefix_ids) and -> past_key_values
+            # Only PyTorch models accept past_key_values from outside
+            self._prefix_ids = {}
+            self.prefix_kv = {}
+            self.supports_prefix_cache = isinstance(self.model, self._torch.nn.Module)
             
             logger.info(f"✓ Model {model_name} loaded successfully!")
             
@@ -59,18 +163,279 @@ class AIWriterModel:
             logger.error(f"Error loading model: {e}")
             raise e
     
-    def generate_text(self, prompt, max_length=500, temperature=0.7, top_p=0.9, top_k=50):
+    def _from_pretrained(self, model_name, use_gpu, **kwargs):
+        """
+        Load a causal LM with the fastest attention kernel available
+        
+        Tries FlashAttention-2 (CUDA + half precision), then PyTorch SDPA,
+        then falls back to the model's default attention. Load errors that
+        are not about the attention kernel are raised right away.
+        """
+        from transformers import AutoModelForCausalLM
+        
+        candidates = ["sdpa"]
+        if use_gpu and kwargs.get("torch_dtype") in (self._torch.float16, self._torch.bfloat16):
+            candidates.insert(0, "flash_attention_2")
+        
+        for attn_implementation in candidates:
+            try:
+                model = AutoModelForCausalLM.from_pretrained(
+                    model_name,
+                    attn_implementation=attn_implementation,
+                    **kwargs
+                )
+                break
+            except (ImportError, ValueError, TypeError) as e:
+                # Anything else (missing accelerate/bitsandbytes, bad kwargs)
+                # would fail the same way with every kernel
+                if not _is_attention_unsupported(e):
+                    raise
+                logger.info(f"{attn_implementation} attention unavailable: {e}")
+        else:
+            logger.warning("No fused attention kernel available, using the model's default attention")
+            model = AutoModelForCausalLM.from_pretrained(model_name, **kwargs)
+        
+        logger.info(f"Attention implementation: {getattr(model.config, '_attn_implementation', 'eager')}")
+        return model
+    
+    def _load_model(self, model_name, use_gpu):
+        """Load the PyTorch model in half precision where supported"""
+        self.dtype = _resolve_dtype(self._torch, use_gpu)
+        logger.info(f"Loading model ({self.dtype} on {self.device})...")
+        model = self._from_pretrained(
+            model_name,
+            use_gpu,
+            torch_dtype=self.dtype,
+            low_cpu_mem_usage=Config.LOW_CPU_MEM_USAGE
+        ).to(self.device)
+        
+        # Set model to evaluation mode
+        model.eval()
+        
+        # Compile the forward pass; generate() keeps calling it through the wrapper
+        if Config.TORCH_COMPILE:
+            logger.info("Compiling model with torch.compile...")
+            model.forward = self._torch.compile(model.forward, mode="reduce-overhead")
+        
+        return model
+    
+    def _load_int8_model(self, model_name, use_gpu):
+        """
+        Load the model with 8-bit weight-only quantization
+        
+        GPU: bitsandbytes LLM.int8() via transformers
+        CPU: OpenVINO INT8 export via optimum-intel
+        """
+        self.dtype = "int8"
+        if use_gpu:
+            from transformers import BitsAndBytesConfig
+            logger.info("Loading model (int8 via bitsandbytes)...")
+            model = self._from_pretrained(
+                model_name,
+                use_gpu,
+                quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                device_map="auto"
+            )
+            model.eval()
+            return model
+        
+        self.backend = 'openvino'
+        return self._load_openvino_model(model_name, load_in_8bit=True)
+    
+    def _load_exported_model(self, model_class, model_name, export_dir, **kwargs):
+        """
+        Load an optimum model, exporting it once and reusing the export afterwards
+        
+        Args:
+            model_class: optimum model class (ORTModelForCausalLM, OVModelForCausalLM)
+            model_name (str): Hugging Face model name
+            export_dir (str): Where the exported model is cached
+            **kwargs: Extra arguments for from_pretrained
+        """
+        if os.path.isdir(export_dir):
+            logger.info(f"Loading exported model from {export_dir}...")
+            return model_class.from_pretrained(export_dir, **kwargs)
+        
+        logger.info(f"Exporting model (first run, cached in {export_dir})...")
+        model = model_class.from_pretrained(model_name, export=True, **kwargs)
+        
+        # Save next to the target and rename into place, so an interrupted
+        # save never leaves a half-written export that is reused on restart
+        parent = os.path.dirname(export_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(export_dir)}-", dir=parent)
+        try:
+            model.save_pretrained(tmp_dir)
+            os.replace(tmp_dir, export_dir)
+        except Exception as e:
+            # e.g. disk full, or another worker finished the same export first; the model is loaded either way
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            logger.warning(f"Could not cache exported model in {export_dir}: {e}")
+        return model
+    
+    def _load_onnx_model(self, model_name, use_gpu):
+        """Load the model on ONNX Runtime (fused graph, optimized CPU kernels)"""
+        from optimum.onnxruntime import ORTModelForCausalLM
+        self.dtype = self._torch.float32
+        logger.info("Loading model (ONNX Runtime)...")
+        return self._load_exported_model(
+            ORTModelForCausalLM,
+            model_name,
+            _export_dir('onnx', model_name),
+            provider="CUDAExecutionProvider" if use_gpu else "CPUExecutionProvider",
+            use_io_binding=use_gpu
+        )
+    
+    def _load_openvino_model(self, model_name, load_in_8bit=False):
+        """Load the model on OpenVINO, optionally with INT8 weights"""
+        from optimum.intel import OVModelForCausalLM
+        self.dtype = "int8" if load_in_8bit else self._torch.float32
+        logger.info(f"Loading model (OpenVINO{' int8' if load_in_8bit else ''})...")
+        return self._load_exported_model(
+            OVModelForCausalLM,
+            model_name,
+            _export_dir('openvino-int8' if load_in_8bit else 'openvino', model_name),
+            load_in_8bit=load_in_8bit
+        )
+    
+    def _get_prefix_ids(self, content_type):
+        """
+        Get the template prefix of content_type and its token ids
+        
+        The prefix is tokenized once per content type and reused afterwards.
+        On that first call a sample prompt checks that prefix ids followed by
+        the separately tokenized rest match the full tokenization; tokenizers
+        that append special tokens or merge across the boundary fail it.
+        
+        Returns:
+            tuple: (prefix, prefix_ids); prefix_ids is None when the prompt
+            cannot be tokenized in two parts for this content type
+        """
+        if content_type not in self._prefix_ids:
+            prefix = PromptTemplates.get_prompt_prefix(content_type)
+            prefix_ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.device)
+            
+            sample = PromptTemplates.get_prompt(content_type, "sample input")
+            full_ids = self.tokenizer(sample).input_ids
+            rest_ids = self.tokenizer(sample[len(prefix):], add_special_tokens=False).input_ids
+            if full_ids != prefix_ids[0].tolist() + rest_ids:
+                logger.info(f"'{content_type}' prompts do not tokenize in two parts, prefix cache disabled for them")
+                prefix_ids = None
+            
+            self._prefix_ids[content_type] = (prefix, prefix_ids)
+        return self._prefix_ids[content_type]
+    
+    def _encode_prompt(self, prompt, content_type):
+        """
+        Tokenize a prompt, reusing the cached ids of its template prefix
+        
+        Only the text after the prefix is tokenized, without special tokens
+        (those, e.g. OPT's leading </s>, are already part of the prefix ids).
+        This matches tokenizing the whole prompt when _get_prefix_ids'
+        check passed for the content type.
+        
+        Args:
+            prompt (str): Full prompt
+            content_type (str): Type of content the prompt was built from, or None
+        
+        Returns:
+            tuple: (input_ids, prefix_length); prefix_length is 0 when no cached prefix was used
+        """
+        if content_type is not None:
+            prefix, prefix_ids = self._get_prefix_ids(content_type)
+            if prefix_ids is not None and prompt.startswith(prefix) and len(prompt) > len(prefix):
+                user_ids = self.tokenizer(
+                    prompt[len(prefix):],
+                    add_special_tokens=False,
+                    return_tensors="pt"
+                ).input_ids.to(self.device)
+                return self._torch.cat([prefix_ids, user_ids], dim=1), prefix_ids.shape[1]
+        
+        input_ids = self.tokenizer(prompt, return_tensors="pt").input_ids.to(self.device)
+        return input_ids, 0
+    
+    def _get_prefix_kv(self, content_type):
+        """
+        Get the cached KV of the template prefix for content_type
+        
+        The prefix is run through the model once per content type; later
+        prompts of that type only need prefill for the user input part.
+        
+        Returns:
+            past_key_values for the prefix (a private copy)
+        """
+        if content_type not in self.prefix_kv:
+            _, prefix_ids = self._get_prefix_ids(content_type)
+            with self._torch.inference_mode():
+                outputs = self.model(prefix_ids, use_cache=True)
+            self.prefix_kv[content_type] = outputs.past_key_values
+            logger.info(f"Cached prefix KV for '{content_type}' ({prefix_ids.shape[1]} tokens)")
+        
+        # generate() may extend the cache in place, so hand it a private copy
+        return copy.deepcopy(self.prefix_kv[content_type])
+    
+    def _prepare_generation(self, prompt, max_length, temperature, top_p, top_k, content_type):
+        """
+        Tokenize a prompt and build the generate() arguments
+        
+        Returns:
+            tuple: (input_ids, generation_kwargs, prefix_type), where prefix_type
+            is the content type whose cached prefix KV can be reused, or None
+        """
+        generation_kwargs = dict(
+            temperature=temperature,
+            top_p=top_p,
+            top_k=top_k,
+            num_return_sequences=1,
+            do_sample=True,
+            pad_token_id=self.tokenizer.eos_token_id,
+            repetition_penalty=1.2,  # Avoid repetition
+            no_repeat_ngram_size=3   # Avoid repeating 3-grams
+        )
+        
+        # Unknown types use the 'content' template
+        if content_type is not None and not PromptTemplates.validate_content_type(content_type):
+            content_type = 'content'
+        
+        # Tokenize input
+        input_ids, prefix_length = self._encode_prompt(prompt, content_type)
+        
+        # Bound the number of decode steps, not the total length; long
+        # prompts still get at least one new token
+        generation_kwargs['max_new_tokens'] = max(1, max_length - input_ids.shape[1])
+        
+        prefix_type = content_type if prefix_length and self.supports_prefix_cache else None
+        return input_ids, generation_kwargs, prefix_type
+    
+    def _generate(self, input_ids, generation_kwargs, prefix_type=None):
+        """Run model.generate, reusing the cached prefix KV of prefix_type if given"""
+        # The cached KV are inference tensors, so fetch them inside the block
+        with self._torch.inference_mode():
+            # Skip prefill of the template prefix when its KV can be reused
+            if prefix_type is not None:
+                generation_kwargs['past_key_values'] = self._get_prefix_kv(prefix_type)
+            
+            return self.model.generate(
+                input_ids,
+                attention_mask=self._torch.ones_like(input_ids),
+                **generation_kwargs
+            )
+    
+    def generate_text(self, prompt, max_length=500, temperature=0.7, top_p=0.9, top_k=50, content_type=None):
         """
         Generate text using the loaded model
         
         Args:
             prompt (str): Input text prompt
-            max_length (int): Maximum length of generated text
+            max_length (int): Maximum total length in tokens (prompt + generated
+                text); generation is bounded by the remaining new-token budget
             temperature (float): Creativity level (0.1-1.0)
                 - Lower (0.1-0.5): More focused and deterministic
                 - Higher (0.7-1.0): More creative and diverse
             top_p (float): Nucleus sampling parameter (0.0-1.0)
             top_k (int): Top-k sampling parameter
+            content_type (str): Template type the prompt was built from;
+                enables reuse of the cached template-prefix ids and KV
         
         Returns:
             str: Generated text string
@@ -78,26 +443,14 @@ class AIWriterModel:
         try:
             logger.info(f"Generating text with prompt length: {len(prompt)}")
             
-            # Generate text
-            result = self.generator(
-                prompt,
-                max_length=max_length,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k,
-                num_return_sequences=1,
-                do_sample=True,
-                pad_token_id=self.tokenizer.eos_token_id,
-                repetition_penalty=1.2,  # Avoid repetition
-                no_repeat_ngram_size=3   # Avoid repeating 3-grams
+            input_ids, generation_kwargs, prefix_type = self._prepare_generation(
+                prompt, max_length, temperature, top_p, top_k, content_type
             )
+            outputs = self._generate(input_ids, generation_kwargs, prefix_type)
             
-            # Extract generated text
-            generated_text = result[0]['generated_text']
-            
-            # Remove the prompt from output
-            if generated_text.startswith(prompt):
-                generated_text = generated_text[len(prompt):].strip()
+            # Decode only the new tokens, the prompt is not part of the output
+            new_tokens = outputs[0, input_ids.shape[1]:]
+            generated_text = self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
             
             logger.info(f"✓ Text generated successfully (length: {len(generated_text)})")
             return generated_text
@@ -106,6 +459,131 @@ class AIWriterModel:
             logger.error(f"Error generating text: {e}")
             raise e
     
+    def generate_text_stream(self, prompt, max_length=500, temperature=0.7, top_p=0.9, top_k=50,
+                             content_type=None, executor=None, stop_event=None):
+        """
+        Generate text and yield it piece by piece as tokens are decoded
+        
+        Takes the same arguments as generate_text. Generation runs on
+        executor (or a background thread if none is given); this generator
+        yields decoded text chunks. Setting stop_event, or closing the
+        generator, stops decoding after the current token.
+        
+        Args:
+            executor: Thread pool to run generation on, bounding concurrent generations
+            stop_event (threading.Event): Optional event the caller sets to cancel
+        
+        Yields:
+            str: Next chunk of generated text
+        """
+        from transformers import TextIteratorStreamer
+        
+        logger.info(f"Streaming text with prompt length: {len(prompt)}")
+        input_ids, generation_kwargs, prefix_type = self._prepare_generation(
+            prompt, max_length, temperature, top_p, top_k, content_type
+        )
+        if stop_event is None:
+            stop_event = threading.Event()
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        generation_kwargs['streamer'] = streamer
+        generation_kwargs['stopping_criteria'] = _stop_on_event(self._torch, stop_event)
+        errors = []
+        
+        def run():
+            try:
+                # Cancelled while still queued on the executor
+                if stop_event.is_set():
+                    streamer.end()
+                    return
+                self._generate(input_ids, generation_kwargs, prefix_type)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer waiting on the streamer
+                streamer.end()
+        
+        if executor is not None:
+            wait = executor.submit(run).result
+        else:
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            wait = thread.join
+        
+        try:
+            for chunk in streamer:
+                if chunk:
+                    yield chunk
+        finally:
+            # Runs on normal completion and on close() (GeneratorExit) alike
+            stop_event.set()
+            wait()
+        
+        if errors:
+            logger.error(f"Error streaming text: {errors[0]}")
+            raise errors[0]
+    
+    def generate_batch(self, prompts, max_lengths, temperature=0.7, top_p=0.9, top_k=50):
+        """
+        Generate text for several prompts in one model.generate call
+        
+        Prompts are left-padded into a single batch that shares prefill and
+        decode. Each row stops after its own new-token budget (finished rows
+        are padded until the largest budget is reached) and is decoded only up
+        to that budget.
+        
+        Args:
+            prompts (list): Input text prompts
+            max_lengths (list): Maximum total length (prompt + output) per prompt
+            temperature (float): Creativity level shared by the batch
+            top_p (float): Nucleus sampling parameter shared by the batch
+            top_k (int): Top-k sampling parameter shared by the batch
+        
+        Returns:
+            list: Generated text per prompt, without the prompt
+        """
+        try:
+            logger.info(f"Generating batch of {len(prompts)} prompts")
+            
+            # Tokenize without padding and left-pad by hand: padding=True would
+            # reconfigure the shared fast tokenizer while other inference
+            # threads use it ("Already borrowed")
+            encoded = self.tokenizer(prompts).input_ids
+            prompt_lengths = [len(ids) for ids in encoded]
+            padded_length = max(prompt_lengths)
+            input_ids = self._torch.full((len(encoded), padded_length), self.tokenizer.pad_token_id, dtype=self._torch.long)
+            attention_mask = self._torch.zeros_like(input_ids)
+            for row, ids in enumerate(encoded):
+                input_ids[row, padded_length - len(ids):] = self._torch.tensor(ids)
+                attention_mask[row, padded_length - len(ids):] = 1
+            input_ids = input_ids.to(self.device)
+            attention_mask = attention_mask.to(self.device)
+            budgets = [max(1, max_length - prompt_length) for max_length, prompt_length in zip(max_lengths, prompt_lengths)]
+            
+            # Generate; each row stops at its own budget, the batch at the largest
+            with self._torch.inference_mode():
+                outputs = self.model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    max_new_tokens=max(budgets),
+                    stopping_criteria=_stop_at_budgets(self._torch, padded_length, budgets),
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k,
+                    do_sample=True,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    repetition_penalty=1.2,
+                    no_repeat_ngram_size=3
+                )
+            
+            # Decode only each row's own new tokens
+            return [
+                self.tokenizer.decode(row[padded_length:padded_length + budget], skip_special_tokens=True).strip()
+                for row, budget in zip(outputs, budgets)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error in batched generation: {e}")
+            raise e
+    
     def generate_with_tokens(self, prompt, max_new_tokens=300, temperature=0.7):
         """
         Generate text using token-based length control
@@ -120,13 +598,14 @@ class AIWriterModel:
         """
         try:
             # Tokenize input
-            inputs = self.tokenizer(prompt, return_tensors="pt")
+            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
             input_length = inputs['input_ids'].shape[1]
             
             # Generate
-            with torch.no_grad():
+            with self._torch.inference_mode():
                 outputs = self.model.generate(
                     inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
                     max_new_tokens=max_new_tokens,
                     temperature=temperature,
                     top_p=0.9,
@@ -136,12 +615,9 @@ class AIWriterModel:
                     repetition_penalty=1.2
                 )
             
-            # Decode output
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Remove prompt from output
-            if generated_text.startswith(prompt):
-                generated_text = generated_text[len(prompt):].strip()
+            # Decode only the new tokens, the prompt is not part of the output
+            new_tokens = outputs[0, input_length:]
+            generated_text = self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
             
             return generated_text
             
@@ -156,10 +632,17 @@ class AIWriterModel:
                 "model_name": self.model_name,
                 "vocab_size": self.tokenizer.vocab_size,
                 "model_type": self.model.config.model_type,
+                "backend": self.backend,
+                "device": str(self.device),
+                "dtype": str(self.dtype),
                 "max_position_embeddings": getattr(self.model.config, 'max_position_embeddings', 'N/A'),
-                "num_parameters": sum(p.numel() for p in self.model.parameters()),
-                "num_parameters_human": f"{sum(p.numel() for p in self.model.parameters()) / 1e6:.1f}M"
+                "attn_implementation": getattr(self.model.config, '_attn_implementation', 'N/A')
             }
+            # ONNX Runtime / OpenVINO models do not expose torch parameters
+            if hasattr(self.model, 'parameters'):
+                num_parameters = sum(p.numel() for p in self.model.parameters())
+                info["num_parameters"] = num_parameters
+                info["num_parameters_human"] = f"{num_parameters / 1e6:.1f}M"
             return info
         except Exception as e:
             logger.error(f"Error getting model info: {e}")
@@ -1,25 +1,139 @@
 # prompts.py - Prompt Templates for Different Content Types
 
-class PromptTemplates:
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Whitespace runs collapsed by clean_output
+_RE_NEWLINES = re.compile(r'\n{3,}')
+_RE_SPACES = re.compile(r' {2,}')
+
+# Typographic characters the model emits, normalized to plain ASCII
+_NORMALIZE_TABLE = str.maketrans({
+    '\u2018': "'",
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u2013': '-',
+    '\u2014': '-',
+    '\t': ' '
+})
+
+# Common generation artifacts; output is cut at the first one found
+_ARTIFACTS = ('[END]', '[DONE]', '<|endoftext|>', '<END>', '</s>')
+_RE_ARTIFACTS = re.compile('|'.join(re.escape(a) for a in _ARTIFACTS))
+
+# Content-specific prefixes handled by clean_output
+_SUMMARY_PREFIX = 'Summary:'
+_VIDEO_HOOK_MARKERS = ('[Opening Hook]', '[Hook]')
+
+# Characters that mark the output as ending on a complete sentence
+_SENTENCE_ENDERS = frozenset('.!?"\')')
+
+# Optional Numba kernel for whitespace collapsing and artifact cutting (compiled on first use).
+# Shorter outputs stay on the regex path, where the kernel's dispatch and
+# UTF-8 round trip would cost more than the cleaning itself.
+_KERNEL_MIN_LENGTH = 200
+_CLEAN_KERNEL = None
+_CLEAN_KERNEL_LOADED = False
+
+
+def _clean_bytes(buf, artifacts, lengths):
     """
-    Prompt templates for different content generation types
+    Collapse whitespace and cut at the first artifact in a UTF-8 byte buffer
+    
+    Runs of 3+ newlines become 2, runs of 2+ spaces become 1. Newline (10)
+    and space (32) never occur inside multi-byte UTF-8 sequences, so
+    working on raw bytes is safe. After each emitted byte the output tail
+    is matched against the (ASCII, whitespace-free) artifacts, so the
+    buffer is truncated in the same pass. No artifact contains another,
+    so the first one to end is also the first one to start.
     """
+    out = buf.copy()
+    n = 0
+    newlines = 0
+    spaces = 0
+    for i in range(buf.shape[0]):
+        c = buf[i]
+        if c == 10:
+            newlines += 1
+            spaces = 0
+            if newlines > 2:
+                continue
+        elif c == 32:
+            spaces += 1
+            newlines = 0
+            if spaces > 1:
+                continue
+        else:
+            newlines = 0
+            spaces = 0
+        out[n] = c
+        n += 1
+        
+        for k in range(artifacts.shape[0]):
+            m = lengths[k]
+            if n < m or artifacts[k, m - 1] != c:
+                continue
+            matched = True
+            for j in range(m - 1):
+                if out[n - m + j] != artifacts[k, j]:
+                    matched = False
+                    break
+            if matched:
+                return out[:n - m]
+    return out[:n]
+
+
+def _get_clean_kernel():
+    """Compile the cleaning kernel with Numba, or return None if Numba is not installed"""
+    global _CLEAN_KERNEL, _CLEAN_KERNEL_LOADED
+    if not _CLEAN_KERNEL_LOADED:
+        _CLEAN_KERNEL_LOADED = True
+        try:
+            import numpy as np
+            from numba import njit
+        except ImportError:
+            logger.info("Numba not installed, using pure-Python output cleaning")
+        else:
+            # Artifacts as a zero-padded byte matrix plus their lengths
+            width = max(len(a) for a in _ARTIFACTS)
+            artifacts = np.zeros((len(_ARTIFACTS), width), dtype=np.uint8)
+            for k, artifact in enumerate(_ARTIFACTS):
+                artifacts[k, :len(artifact)] = np.frombuffer(artifact.encode('ascii'), dtype=np.uint8)
+            lengths = np.array([len(a) for a in _ARTIFACTS], dtype=np.int64)
+            _CLEAN_KERNEL = (np, njit(cache=True)(_clean_bytes), artifacts, lengths)
+    return _CLEAN_KERNEL
+
+
+def _collapse_and_cut(text):
+    """Remove excessive newlines and spaces, then cut at the first generation artifact"""
+    # Substring checks are plain C scans; most outputs have no runs at all
+    has_newline_run = '\n\n\n' in text
+    has_space_run = '  ' in text
     
-    @staticmethod
-    def get_prompt(content_type, user_input):
-        """
-        Generate appropriate prompt based on content type
-        
-        Args:
-            content_type (str): Type of content (blog, email, copy, etc.)
-            user_input (str): User's input text
-        
-        Returns:
-            str: Formatted prompt string
-        """
-        
-        prompts = {
-            'blog': f"""Write a comprehensive and engaging blog post about: {user_input}
+    use_kernel = (has_newline_run or has_space_run) and len(text) >= _KERNEL_MIN_LENGTH
+    kernel = _get_clean_kernel() if use_kernel else None
+    if kernel is None:
+        if has_newline_run:
+            text = _RE_NEWLINES.sub('\n\n', text)
+        if has_space_run:
+            text = _RE_SPACES.sub(' ', text)
+        match = _RE_ARTIFACTS.search(text)
+        return text[:match.start()] if match else text
+    
+    np, clean, artifacts, lengths = kernel
+    buf = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    return clean(buf, artifacts, lengths).tobytes().decode('utf-8')
+
+
+# Prompt templates, filled in with str.format_map on the selected entry only.
+# {context} sits right before the final header line and is empty unless
+# add_context supplies extra requirements.
+_PROMPTS = {
+    'blog': """Write a comprehensive and engaging blog post about: {user_input}
 
 Create a well-structured blog post with the following elements:
 - An attention-grabbing introduction
@@ -27,10 +141,10 @@ Create a well-structured blog post with the following elements:
 - Practical examples or insights
 - A strong conclusion
 
-Blog Post:
+{context}Blog Post:
 """,
-            
-            'email': f"""Write a professional email about: {user_input}
+    
+    'email': """Write a professional email about: {user_input}
 
 The email should include:
 - A clear and relevant subject line
@@ -38,13 +152,13 @@ The email should include:
 - Well-structured body with main message
 - Appropriate closing and sign-off
 
-Email:
+{context}Email:
 Subject: 
 Dear [Recipient],
 
 """,
-            
-            'copy': f"""Write persuasive marketing copy for: {user_input}
+    
+    'copy': """Write persuasive marketing copy for: {user_input}
 
 Create compelling marketing copy that includes:
 - An attention-grabbing headline
@@ -52,10 +166,10 @@ Create compelling marketing copy that includes:
 - Emotional appeal and value proposition
 - Strong call-to-action that motivates readers
 
-Marketing Copy:
+{context}Marketing Copy:
 """,
-            
-            'seo': f"""Write SEO-optimized content about: {user_input}
+    
+    'seo': """Write SEO-optimized content about: {user_input}
 
 Create search engine optimized content that includes:
 - Relevant keywords naturally integrated throughout
@@ -63,10 +177,10 @@ Create search engine optimized content that includes:
 - Informative and valuable content for readers
 - Meta description friendly structure
 
-SEO Content:
+{context}SEO Content:
 """,
-            
-            'video': f"""Write an engaging video script about: {user_input}
+    
+    'video': """Write an engaging video script about: {user_input}
 
 Create a video script with:
 - A powerful hook to grab attention in the first 5 seconds
@@ -74,30 +188,145 @@ Create a video script with:
 - Natural conversational tone
 - Strong call-to-action at the end
 
-Video Script:
+{context}Video Script:
 [Opening Hook]
 """,
-            
-            'summarize': f"""Provide a clear and concise summary of the following text. Capture the main points and key information:
+    
+    'summarize': """Provide a clear and concise summary of the following text. Capture the main points and key information:
 
 {user_input}
 
-Summary:
+{context}Summary:
 """,
-            
-            'content': f"""Generate creative and engaging content about: {user_input}
+    
+    'content': """Generate creative and engaging content about: {user_input}
 
 Create original content that is:
 - Well-written and easy to read
 - Informative and valuable
 - Properly structured with clear flow
 
-Content:
+{context}Content:
 """
-        }
+}
+
+# Context block for add_context; the trailing blank line keeps the spacing
+# the templates previously got from re-joining their paragraphs
+_CONTEXT_SECTION = "\nAdditional Context: {}\n\n\n\n"
+
+# Short templates as (prefix, suffix) pairs around the user input
+_SHORT_PROMPTS = {
+    'blog': ("Write a blog post about ", ":\n\n"),
+    'email': ("Write a professional email about ", ":\n\n"),
+    'copy': ("Write marketing copy for ", ":\n\n"),
+    'seo': ("Write SEO content about ", ":\n\n"),
+    'video': ("Write a video script about ", ":\n\n"),
+    'summarize': ("Summarize: ", "\n\nSummary:\n"),
+    'content': ("Write about ", ":\n\n")
+}
+
+# Supported content types (ordered for display, set for O(1) membership)
+_AVAILABLE_TYPES_TUPLE = (
+    'blog',
+    'email',
+    'copy',
+    'seo',
+    'video',
+    'summarize',
+    'content'
+)
+_AVAILABLE_TYPES_SET = frozenset(_AVAILABLE_TYPES_TUPLE)
+
+_TYPE_DESCRIPTIONS = {
+    'blog': 'Generate comprehensive blog posts with introduction, body, and conclusion',
+    'email': 'Create professional emails with proper structure and formatting',
+    'copy': 'Write persuasive marketing copy with strong call-to-action',
+    'seo': 'Generate SEO-optimized content with relevant keywords',
+    'video': 'Create engaging video scripts with hooks and CTAs',
+    'summarize': 'Provide concise summaries of longer text content',
+    'content': 'Generate general creative content on any topic'
+}
+
+# Prompt building is pure, so repeated (content_type, user_input) pairs
+# (regenerations, retries) are served from a small LRU cache. Inputs above
+# _PROMPT_CACHE_MAX_INPUT characters bypass it, which keeps the cache under
+# about 1 MB (256 entries x input + template) however large requests get.
+_PROMPT_CACHE_SIZE = 256
+_PROMPT_CACHE_MAX_INPUT = 1024
+
+
+def _build_prompt(content_type, user_input):
+    """Fill only the selected template, default to 'content'"""
+    template = _PROMPTS.get(content_type, _PROMPTS['content'])
+    return template.format_map({'user_input': user_input, 'context': ''})
+
+
+def _build_short_prompt(content_type, user_input):
+    """Wrap the user input in the selected short template, default to 'content'"""
+    prefix, suffix = _SHORT_PROMPTS.get(content_type, _SHORT_PROMPTS['content'])
+    return prefix + user_input + suffix
+
+
+_build_prompt_cached = lru_cache(maxsize=_PROMPT_CACHE_SIZE)(_build_prompt)
+_build_short_prompt_cached = lru_cache(maxsize=_PROMPT_CACHE_SIZE)(_build_short_prompt)
+
+
+class PromptTemplates:
+    """
+    Prompt templates for different content generation types
+    """
+    
+    @staticmethod
+    def get_prompt(content_type, user_input):
+        """
+        Generate appropriate prompt based on content type
+        
+        Args:
+            content_type (str): Type of content (blog, email, copy, etc.)
+            user_input (str): User's input text
+        
+        Returns:
+            str: Formatted prompt string
+        """
+        
+        if len(user_input) > _PROMPT_CACHE_MAX_INPUT:
+            return _build_prompt(content_type, user_input)
+        return _build_prompt_cached(content_type, user_input)
+    
+    
+    @staticmethod
+    def get_prompt_prefix(content_type):
+        """
+        Get the static template text that comes before the user input
+        
+        Trailing whitespace is left out so the prefix tokenizes to the same
+        tokens on its own as it does at the start of the full prompt.
+        
+        Args:
+            content_type (str): Type of content
         
-        # Return the appropriate prompt or default to 'content'
-        return prompts.get(content_type, prompts['content'])
+        Returns:
+            str: Template prefix shared by every prompt of this type
+        """
+        template = _PROMPTS.get(content_type, _PROMPTS['content'])
+        return template.split('{user_input}', 1)[0].rstrip()
+    
+    
+    @staticmethod
+    def get_prompt_parts(content_type, user_input):
+        """
+        Split a prompt into its static template prefix and the remainder
+        
+        Args:
+            content_type (str): Type of content
+            user_input (str): User's input text
+        
+        Returns:
+            tuple: (prefix, remainder), where prefix + remainder is the full prompt
+        """
+        prefix = PromptTemplates.get_prompt_prefix(content_type)
+        prompt = PromptTemplates.get_prompt(content_type, user_input)
+        return prefix, prompt[len(prefix):]
     
     
     @staticmethod
@@ -112,18 +341,9 @@ Content:
         Returns:
             str: Short formatted prompt
         """
-        
-        short_prompts = {
-            'blog': f"Write a blog post about {user_input}:\n\n",
-            'email': f"Write a professional email about {user_input}:\n\n",
-            'copy': f"Write marketing copy for {user_input}:\n\n",
-            'seo': f"Write SEO content about {user_input}:\n\n",
-            'video': f"Write a video script about {user_input}:\n\n",
-            'summarize': f"Summarize: {user_input}\n\nSummary:\n",
-            'content': f"Write about {user_input}:\n\n"
-        }
-        
-        return short_prompts.get(content_type, short_prompts['content'])
+        if len(user_input) > _PROMPT_CACHE_MAX_INPUT:
+            return _build_short_prompt(content_type, user_input)
+        return _build_short_prompt_cached(content_type, user_input)
     
     
     @staticmethod
@@ -142,26 +362,14 @@ Content:
         # Remove leading/trailing whitespace
         text = generated_text.strip()
         
-        # Remove excessive newlines (more than 2 consecutive)
-        while '\n\n\n' in text:
-            text = text.replace('\n\n\n', '\n\n')
-        
-        # Remove excessive spaces
-        while '  ' in text:
-            text = text.replace('  ', ' ')
-        
-        # Remove common artifacts from generation
-        artifacts = [
-            '[END]',
-            '[DONE]',
-            '<|endoftext|>',
-            '<END>',
-            '</s>',
-        ]
+        # Normalize quotes, dashes and tabs (isascii is O(1), so pure-ASCII
+        # output without tabs skips the copy)
+        if not text.isascii() or '\t' in text:
+            text = text.translate(_NORMALIZE_TABLE)
         
-        for artifact in artifacts:
-            if artifact in text:
-                text = text.split(artifact)[0]
+        # Remove excessive newlines and spaces, and cut at the first
+        # generation artifact (one pass when the Numba kernel is available)
+        text = _collapse_and_cut(text)
         
         # Content-specific cleaning
         if content_type == 'email':
@@ -170,29 +378,36 @@ Content:
                 text = f"Subject: Re: Your Inquiry\n\n{text}"
         
         elif content_type == 'video':
-            # Ensure video script markers are present
-            if '[Opening Hook]' not in text and '[Hook]' not in text:
+            # Ensure the video script opens with a hook marker
+            if not text.startswith(_VIDEO_HOOK_MARKERS):
                 text = f"[Opening Hook]\n{text}"
         
         elif content_type == 'summarize':
             # For summaries, remove redundant "Summary:" labels
-            if text.startswith('Summary:'):
-                text = text.replace('Summary:', '', 1).strip()
+            if text.startswith(_SUMMARY_PREFIX):
+                text = text[len(_SUMMARY_PREFIX):].strip()
         
         # Remove incomplete sentences at the end (optional)
-        if len(text) > 100 and not text[-1] in ['.', '!', '?', '"', "'", ')']:
-            # Find the last complete sentence
+        if len(text) > 100 and text[-1] not in _SENTENCE_ENDERS:
+            # Find the last complete sentence, only searching the last 30%
+            cutoff = int(len(text) * 0.7) + 1
             last_period = max(
-                text.rfind('.'),
-                text.rfind('!'),
-                text.rfind('?')
+                text.rfind('.', cutoff),
+                text.rfind('!', cutoff),
+                text.rfind('?', cutoff)
             )
-            if last_period > len(text) * 0.7:  # Only if it's in the last 30%
+            if last_period != -1:
                 text = text[:last_period + 1]
         
         return text.strip()
     
     
+    @staticmethod
+    def warmup():
+        """Compile the optional Numba cleaning kernel so the first request does not pay for it"""
+        _collapse_and_cut("warm  up\n\n\n" * _KERNEL_MIN_LENGTH + "[END]")
+    
+    
     @staticmethod
     def add_context(content_type, user_input, additional_context=""):
         """
@@ -207,17 +422,15 @@ Content:
             str: Enhanced prompt with context
         """
         
-        base_prompt = PromptTemplates.get_prompt(content_type, user_input)
+        if not additional_context:
+            return PromptTemplates.get_prompt(content_type, user_input)
         
-        if additional_context:
-            context_section = f"\nAdditional Context: {additional_context}\n\n"
-            # Insert context before the content generation starts
-            parts = base_prompt.split('\n\n')
-            if len(parts) > 1:
-                parts.insert(-1, context_section)
-                return '\n\n'.join(parts)
-        
-        return base_prompt
+        # Insert context before the content generation starts
+        template = _PROMPTS.get(content_type, _PROMPTS['content'])
+        return template.format_map({
+            'user_input': user_input,
+            'context': _CONTEXT_SECTION.format(additional_context)
+        })
     
     
     @staticmethod
@@ -226,17 +439,9 @@ Content:
         Get list of available content types
         
         Returns:
-            list: Available content types
+            tuple: Available content types
         """
-        return [
-            'blog',
-            'email',
-            'copy',
-            'seo',
-            'video',
-            'summarize',
-            'content'
-        ]
+        return _AVAILABLE_TYPES_TUPLE
     
     
     @staticmethod
@@ -250,7 +455,7 @@ Content:
         Returns:
             bool: True if valid, False otherwise
         """
-        return content_type in PromptTemplates.get_available_types()
+        return content_type in _AVAILABLE_TYPES_SET
     
     
     @staticmethod
@@ -264,15 +469,4 @@ Content:
         Returns:
             str: Description of the content type
         """
-        
-        descriptions = {
-            'blog': 'Generate comprehensive blog posts with introduction, body, and conclusion',
-            'email': 'Create professional emails with proper structure and formatting',
-            'copy': 'Write persuasive marketing copy with strong call-to-action',
-            'seo': 'Generate SEO-optimized content with relevant keywords',
-            'video': 'Create engaging video scripts with hooks and CTAs',
-            'summarize': 'Provide concise summaries of longer text content',
-            'content': 'Generate general creative content on any topic'
-        }
-        
-        return descriptions.get(content_type, 'Generate content')
\ No newline at end of file
+        return _TYPE_DESCRIPTIONS.get(content_type, 'Generate content')
\ No newline at end of file